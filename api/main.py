@@ -9,21 +9,28 @@ Features:
 
 Run with:
     uvicorn api.main:app --reload
+
+uvicorn runs on uvloop automatically when it is installed (see requirements.txt).
 """
 
 import os
 import time
-import json
+import asyncio
+import bisect
 import hashlib
-from collections import deque
+import json
+import re
+from collections import OrderedDict, deque
 from contextlib import asynccontextmanager
 
+import anyio
 import openai
 import httpx
+import orjson
 import bcrypt
 import jwt
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query, Depends, Header
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import create_engine, Column, String, Float, Integer, DateTime, Boolean
@@ -50,9 +57,15 @@ OPENAI_RATE_LIMIT_PER_MINUTE = int(os.getenv("OPENAI_RATE_LIMIT_PER_MINUTE", "60
 OPENAI_RATE_LIMIT_PER_DAY = int(os.getenv("OPENAI_RATE_LIMIT_PER_DAY", "1000"))
 GOOGLE_RATE_LIMIT_PER_MINUTE = int(os.getenv("GOOGLE_RATE_LIMIT_PER_MINUTE", "60"))
 GOOGLE_RATE_LIMIT_PER_DAY = int(os.getenv("GOOGLE_RATE_LIMIT_PER_DAY", "1000"))
+GOOGLE_MAX_CONCURRENCY = int(os.getenv("GOOGLE_MAX_CONCURRENCY", "10"))  # Simultaneous Places requests
 
-# Cache TTL
+# Worker threads for sync endpoints (database access, bcrypt hashing); anyio's default is 40
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "64"))
+
+# Cache TTL and size
 CACHE_TTL_SECONDS = 30 * 60  # 30 minutes
+CACHE_MAX_ENTRIES = 1024
+CACHE_CLEANUP_INTERVAL_SECONDS = 5 * 60  # How often expired entries are swept
 
 
 # =============================================================================
@@ -120,22 +133,30 @@ class RateLimiter:
         self.per_minute = per_minute
         self.per_day = per_day
         self.name = name
-        self.minute_window: deque = deque()
-        self.day_window: deque = deque()
+        self.minute_window: deque = deque()  # At most per_minute entries
+        self.day_window: list[float] = []  # Sorted, so expired entries are found by bisect
 
     def _clean_windows(self):
         """Remove expired timestamps from windows."""
-        now = time.time()
+        now = time.monotonic()
         minute_ago = now - 60
         day_ago = now - 86400
 
-        while self.minute_window and self.minute_window[0] < minute_ago:
-            self.minute_window.popleft()
-        while self.day_window and self.day_window[0] < day_ago:
-            self.day_window.popleft()
+        minute_window = self.minute_window
+        while minute_window and minute_window[0] < minute_ago:
+            minute_window.popleft()
+
+        # The day window can hold thousands of entries; drop the expired prefix in one slice
+        expired = bisect.bisect_left(self.day_window, day_ago)
+        if expired:
+            del self.day_window[:expired]
 
     def check(self) -> tuple[bool, str]:
         """Check if request is allowed. Returns (allowed, reason)."""
+        # Fast path: under both limits even counting stale entries, so nothing to evict
+        if len(self.minute_window) < self.per_minute and len(self.day_window) < self.per_day:
+            return True, ""
+
         self._clean_windows()
 
         if len(self.minute_window) >= self.per_minute:
@@ -147,10 +168,22 @@ class RateLimiter:
 
     def record(self):
         """Record a request."""
-        now = time.time()
+        now = time.monotonic()
         self.minute_window.append(now)
         self.day_window.append(now)
 
+    def try_acquire(self) -> tuple[bool, str]:
+        """Check and record a request in one step. Returns (allowed, reason).
+
+        There is no await between the check and the record, so concurrent
+        coroutines on the event loop can't all slip past the limit before
+        any of them has been counted.
+        """
+        allowed, reason = self.check()
+        if allowed:
+            self.record()
+        return allowed, reason
+
     def status(self) -> dict:
         """Get current rate limit status."""
         self._clean_windows()
@@ -167,27 +200,41 @@ class RateLimiter:
 # =============================================================================
 
 class SearchCache:
-    """Simple TTL cache for Google Places results."""
+    """Size-bounded LRU cache with TTL, keyed on normalized query text."""
 
-    def __init__(self, ttl_seconds: int = CACHE_TTL_SECONDS):
+    def __init__(self, ttl_seconds: int = CACHE_TTL_SECONDS, maxsize: int = CACHE_MAX_ENTRIES):
         self.ttl = ttl_seconds
-        self.cache: dict[str, tuple[float, list]] = {}
+        self.maxsize = maxsize
+        self.cache: OrderedDict[str, tuple[float, list | dict]] = OrderedDict()
 
-    def _make_key(self, query: str) -> str:
-        return hashlib.md5(query.lower().strip().encode()).hexdigest()
+    def make_key(self, query: str) -> str:
+        """Normalize a query into its cache key."""
+        # The normalized query is already a perfectly good dict key; no need to hash it
+        return query.strip().lower()
 
-    def get(self, query: str) -> list | None:
-        key = self._make_key(query)
+    def get(self, query: str) -> list | dict | None:
+        return self.get_by_key(self.make_key(query))
+
+    def set(self, query: str, data: list | dict):
+        self.set_by_key(self.make_key(query), data)
+
+    def get_by_key(self, key: str) -> list | dict | None:
+        """Like get(), for callers that already hold the key from make_key()."""
         if key in self.cache:
             timestamp, data = self.cache[key]
             if time.time() - timestamp < self.ttl:
+                self.cache.move_to_end(key)
                 return data
             del self.cache[key]
         return None
 
-    def set(self, query: str, data: list):
-        key = self._make_key(query)
+    def set_by_key(self, key: str, data: list | dict):
+        """Like set(), for callers that already hold the key from make_key()."""
         self.cache[key] = (time.time(), data)
+        self.cache.move_to_end(key)
+        # Evict least recently used entries
+        while len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
 
     def clear_expired(self):
         """Remove expired entries."""
@@ -204,8 +251,12 @@ class SearchCache:
 openai_limiter = RateLimiter(OPENAI_RATE_LIMIT_PER_MINUTE, OPENAI_RATE_LIMIT_PER_DAY, "OpenAI")
 google_limiter = RateLimiter(GOOGLE_RATE_LIMIT_PER_MINUTE, GOOGLE_RATE_LIMIT_PER_DAY, "Google")
 places_cache = SearchCache()
-openai_client: openai.OpenAI | None = None
+plan_cache = SearchCache()  # Parsed LLM plans, so repeated trip requests skip OpenAI
+inflight_searches: dict[str, asyncio.Future] = {}
+background_tasks: set[asyncio.Task] = set()  # Strong refs so fire-and-forget tasks aren't GC'd
+openai_client: openai.AsyncOpenAI | None = None
 http_client: httpx.AsyncClient | None = None
+google_semaphore: asyncio.Semaphore | None = None  # Caps concurrent Places requests across all /plan calls
 
 
 # =============================================================================
@@ -328,32 +379,52 @@ GUIDELINES:
 - IMPORTANT: Stay within the geographic region the user requested. If they say "Texas roadtrip", ALL destinations must be in Texas. If they say "California coast trip", stay in California. Only include other states if the user explicitly requests a multi-state trip (e.g., "Texas to Nashville", "Southwest road trip", "cross-country trip")."""
 
 
+# Matches a fully generated "search_query": "..." pair in the partial LLM output
+SEARCH_QUERY_PATTERN = re.compile(r'"search_query"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
 async def call_openai(query: str) -> dict:
-    """Parse user query into detailed trip plan using OpenAI."""
+    """
+    Parse user query into detailed trip plan using OpenAI.
+
+    The response is streamed, and every search_query is prefetched from
+    Google Places as soon as it has been generated, so place lookups for
+    early days overlap with the LLM still writing later days.
+    """
     if openai_client is None:
         raise HTTPException(status_code=503, detail="OpenAI client not initialized")
 
-    allowed, reason = openai_limiter.check()
+    allowed, reason = openai_limiter.try_acquire()
     if not allowed:
         raise HTTPException(status_code=429, detail=reason)
 
     try:
-        response = openai_client.chat.completions.create(
+        stream = await openai_client.chat.completions.create(
             model="gpt-4o-mini",
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": PLAN_SYSTEM_PROMPT},
                 {"role": "user", "content": f"Plan this trip: {query}"}
-            ]
+            ],
+            stream=True,
         )
-        openai_limiter.record()
 
-        response_text = response.choices[0].message.content
-        return json.loads(response_text)
+        response_text = ""
+        scanned = 0
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            response_text += chunk.choices[0].delta.content
+
+            for match in SEARCH_QUERY_PATTERN.finditer(response_text, scanned):
+                prefetch_place(orjson.loads(f'"{match.group(1)}"'))
+                scanned = match.end()
+
+        return orjson.loads(response_text)
 
     except openai.APIError as e:
         raise HTTPException(status_code=502, detail=f"OpenAI API error: {str(e)}")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to parse LLM response")
 
 
@@ -361,35 +432,147 @@ async def call_openai(query: str) -> dict:
 # GOOGLE PLACES INTEGRATION
 # =============================================================================
 
-GOOGLE_PLACES_URL = "https://places.googleapis.com/v1/places:searchText"
+GOOGLE_PLACES_HOST = "https://places.googleapis.com"
+GOOGLE_PLACES_URL = f"{GOOGLE_PLACES_HOST}/v1/places:searchText"
+# Fetch sizes, up to Text Search's maximum page size. A request is rounded up to
+# the next size, so /plan's 1-result lookups don't download and cache a full
+# page, while callers asking for different counts still share fetches
+GOOGLE_PLACES_RESULT_SIZES = (1, 5, 20)
+
+# Built once; the shared http_client also calls WeatherAPI, so these can't be client defaults
+GOOGLE_PLACES_HEADERS = {
+    "Content-Type": "application/json",
+    "X-Goog-Api-Key": GOOGLE_PLACES_API_KEY or "",
+    "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.types,places.primaryType,places.photos,places.priceLevel"
+}
+
+# Google's priceLevel enum -> our 1-4 scale (PRICE_LEVEL_FREE/UNSPECIFIED map to None)
+GOOGLE_PRICE_LEVELS = {
+    "PRICE_LEVEL_INEXPENSIVE": 1,
+    "PRICE_LEVEL_MODERATE": 2,
+    "PRICE_LEVEL_EXPENSIVE": 3,
+    "PRICE_LEVEL_VERY_EXPENSIVE": 4,
+}
+
+
+def places_fetch_sizes(max_results: int) -> tuple[int, ...]:
+    """Fetch sizes whose results can serve max_results, smallest first."""
+    sizes = tuple(size for size in GOOGLE_PLACES_RESULT_SIZES if size >= max_results)
+    return sizes or GOOGLE_PLACES_RESULT_SIZES[-1:]
+
+
+def places_cache_key(key: str, size: int) -> str:
+    """Cache and in-flight key for a fetch of size results for a normalized query."""
+    return f"{key}|{size}"
+
 
+def cached_places(key: str, max_results: int) -> list[PlaceSummary] | None:
+    """Cached results for a normalized query from any fetch big enough, or None."""
+    for size in places_fetch_sizes(max_results):
+        cached = places_cache.get_by_key(places_cache_key(key, size))
+        if cached is not None:
+            return cached[:max_results]
+    return None
 
-async def search_google_places(query: str, max_results: int = 5) -> list[dict]:
+
+async def search_google_places(query: str, max_results: int = 5) -> list[PlaceSummary]:
     """Search Google Places Text Search API with caching."""
-    # Check cache first
-    cached = places_cache.get(query)
+    # Check cache first (the key is computed once and reused for the in-flight map and set)
+    key = places_cache.make_key(query)
+    cached = cached_places(key, max_results)
     if cached is not None:
-        return cached[:max_results]
+        return cached
+
+    # Share a single in-flight request between concurrent identical queries,
+    # joining any fetch that asked for at least as many results
+    sizes = places_fetch_sizes(max_results)
+    fetch_keys = [places_cache_key(key, size) for size in sizes]
+    pending = next((inflight_searches[k] for k in fetch_keys if k in inflight_searches), None)
+    if pending is None:
+        fetch_key = fetch_keys[0]
+        pending = asyncio.ensure_future(_fetch_google_places(key, sizes[0]))
+        inflight_searches[fetch_key] = pending
+
+        def _done(future: asyncio.Future):
+            inflight_searches.pop(fetch_key, None)
+            if not future.cancelled():
+                future.exception()  # Mark it retrieved; a shielded fetch can outlive all its waiters
+
+        pending.add_done_callback(_done)
+
+    # Shielded so a cancelled waiter (e.g. a dropped client) doesn't cancel the fetch for the others
+    results = await asyncio.shield(pending)
+    return results[:max_results]
+
+
+_EMPTY: dict = {}  # Shared read-only default for missing nested objects
+
+
+def place_from_google(place: dict) -> PlaceSummary:
+    """Convert one Places API result into a PlaceSummary."""
+    get = place.get
+    location = get("location") or _EMPTY
+
+    # Get photo URL if available
+    photo_url = None
+    photos = get("photos")
+    if photos:
+        photo_name = photos[0].get("name", "")
+        if photo_name:
+            photo_url = f"{GOOGLE_PLACES_HOST}/v1/{photo_name}/media?maxWidthPx=400&key={GOOGLE_PLACES_API_KEY}"
+
+    # Every field is shaped by us here, so skip pydantic validation
+    return PlaceSummary.model_construct(
+        place_id=get("id", ""),
+        name=(get("displayName") or _EMPTY).get("text", ""),
+        address=get("formattedAddress", ""),
+        lat=location.get("latitude", 0.0),
+        lng=location.get("longitude", 0.0),
+        rating=get("rating"),
+        rating_count=get("userRatingCount", 0),
+        category=get("primaryType", ""),
+        photo_url=photo_url,
+        # Google returns strings like "PRICE_LEVEL_MODERATE"
+        price_level=GOOGLE_PRICE_LEVELS.get(get("priceLevel") or ""),
+    )
+
+
+def prefetch_place(query: str):
+    """Start a background search so a later search_google_places call finds it cached or in flight."""
+    async def _prefetch():
+        try:
+            await search_google_places(query, max_results=1)
+        except HTTPException:
+            pass  # create_plan retries the lookup and skips it if it still fails
+        except Exception as e:
+            # Nothing awaits this task, so report the error here instead of losing it
+            print(f"Places prefetch failed for {query!r}: {e!r}")
+
+    task = asyncio.create_task(_prefetch())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def _fetch_google_places(key: str, max_results: int) -> list[PlaceSummary]:
+    """Call the Google Places Text Search API and cache the results.
 
+    The normalized cache key doubles as the textQuery, so differently-cased
+    queries from the LLM share one cache entry and one request.
+    """
     # Check rate limit
-    allowed, reason = google_limiter.check()
+    allowed, reason = google_limiter.try_acquire()
     if not allowed:
         raise HTTPException(status_code=429, detail=reason)
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": GOOGLE_PLACES_API_KEY,
-        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.types,places.primaryType,places.photos,places.priceLevel"
-    }
-
-    body = {
-        "textQuery": query,
+    # Pre-encoded with orjson; GOOGLE_PLACES_HEADERS already sets the JSON content type
+    body = orjson.dumps({
+        "textQuery": key,
         "maxResultCount": max_results
-    }
+    })
 
     try:
-        response = await http_client.post(GOOGLE_PLACES_URL, headers=headers, json=body)
-        google_limiter.record()
+        async with google_semaphore:
+            response = await http_client.post(GOOGLE_PLACES_URL, headers=GOOGLE_PLACES_HEADERS, content=body)
 
         if response.status_code != 200:
             error_detail = response.text
@@ -398,49 +581,14 @@ async def search_google_places(query: str, max_results: int = 5) -> list[dict]:
                 detail=f"Google Places API error: {response.status_code} - {error_detail}"
             )
 
-        data = response.json()
+        data = orjson.loads(response.content)
         places = data.get("places", [])
 
         # Transform to our format
-        results = []
-        for place in places:
-            location = place.get("location", {})
-
-            # Get photo URL if available
-            photo_url = None
-            photos = place.get("photos", [])
-            if photos:
-                photo_name = photos[0].get("name", "")
-                if photo_name:
-                    photo_url = f"https://places.googleapis.com/v1/{photo_name}/media?maxWidthPx=400&key={GOOGLE_PLACES_API_KEY}"
-
-            # Parse price level (Google returns strings like "PRICE_LEVEL_MODERATE")
-            price_level_str = place.get("priceLevel", "")
-            price_level = None
-            if "INEXPENSIVE" in price_level_str:
-                price_level = 1
-            elif "MODERATE" in price_level_str:
-                price_level = 2
-            elif "EXPENSIVE" in price_level_str:
-                price_level = 3
-            elif "VERY_EXPENSIVE" in price_level_str:
-                price_level = 4
-
-            results.append({
-                "place_id": place.get("id", ""),
-                "name": place.get("displayName", {}).get("text", ""),
-                "address": place.get("formattedAddress", ""),
-                "lat": location.get("latitude", 0),
-                "lng": location.get("longitude", 0),
-                "rating": place.get("rating"),
-                "rating_count": place.get("userRatingCount", 0),
-                "category": place.get("primaryType", ""),
-                "photo_url": photo_url,
-                "price_level": price_level,
-            })
-
-        # Cache results
-        places_cache.set(query, results)
+        results = [place_from_google(place) for place in places]
+
+        # Cache models rather than dicts so cache hits skip model construction too
+        places_cache.set_by_key(places_cache_key(key, max_results), results)
         return results
 
     except httpx.RequestError as e:
@@ -451,21 +599,32 @@ async def search_google_places(query: str, max_results: int = 5) -> list[dict]:
 # LIFESPAN
 # =============================================================================
 
+async def periodic_cache_cleanup():
+    """Sweep expired cache entries so they don't linger until the LRU pushes them out."""
+    while True:
+        await asyncio.sleep(CACHE_CLEANUP_INTERVAL_SECONDS)
+        places_cache.clear_expired()
+        plan_cache.clear_expired()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize clients on startup, cleanup on shutdown."""
-    global openai_client, http_client, db_engine, SessionLocal
+    global openai_client, http_client, google_semaphore, db_engine, SessionLocal
 
     # Validate API keys
     if not OPENAI_API_KEY:
         print("WARNING: OPENAI_API_KEY not set. /plan endpoint will not work.")
     else:
-        openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
         print("OpenAI client initialized")
 
     if not GOOGLE_PLACES_API_KEY:
         print("WARNING: GOOGLE_PLACES_API_KEY not set. Search endpoints will not work.")
 
+    # Sync endpoints (DB queries, bcrypt) run in anyio's threadpool; size it for concurrent load
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
     # Initialize database
     if DATABASE_URL:
         db_engine = create_engine(DATABASE_URL)
@@ -475,13 +634,33 @@ async def lifespan(app: FastAPI):
     else:
         print("WARNING: DATABASE_URL not set. Favorites sync will not work.")
 
-    http_client = httpx.AsyncClient(timeout=30.0)
+    # HTTP/2 lets the many small Places searches issued by /plan share one connection
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    )
+    google_semaphore = asyncio.Semaphore(GOOGLE_MAX_CONCURRENCY)
     print("HTTP client initialized")
+
+    # Pre-warm the Google connection so the first /plan doesn't pay the TLS handshake
+    if GOOGLE_PLACES_API_KEY:
+        try:
+            await http_client.head(GOOGLE_PLACES_HOST)
+        except httpx.HTTPError as e:
+            print(f"WARNING: Could not pre-warm Google Places connection: {e}")
+
+    cleanup_task = asyncio.create_task(periodic_cache_cleanup())
     print("Ready to serve requests!")
 
     yield
 
     # Cleanup
+    cleanup_task.cancel()
+    try:
+        await cleanup_task
+    except asyncio.CancelledError:
+        pass
     if http_client:
         await http_client.aclose()
     if db_engine:
@@ -513,6 +692,27 @@ app.add_middleware(
 # ENDPOINTS
 # =============================================================================
 
+def json_response(model: BaseModel) -> Response:
+    """Serialize a response model with pydantic-core, skipping FastAPI's re-encoding."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def etag_response(content: dict, if_none_match: str | None) -> Response:
+    """
+    Serialize content with an ETag, or send an empty 304 if the client already has it.
+
+    Cache-Control: no-cache lets the browser keep the body but revalidate on
+    every request, so changes still show up immediately.
+    """
+    body = orjson.dumps(content)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if if_none_match and etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/search", response_model=SearchResponse)
 async def search(
     query: str = Query(..., min_length=1, description="Search query for places"),
@@ -526,10 +726,10 @@ async def search(
 
     results = await search_google_places(query, max_results=limit)
 
-    return SearchResponse(
+    return json_response(SearchResponse(
         query=query,
-        results=[PlaceSummary(**r) for r in results],
-    )
+        results=results,
+    ))
 
 
 @app.post("/plan", response_model=PlanResponse)
@@ -554,26 +754,59 @@ async def create_plan(request: PlanRequest):
     if not GOOGLE_PLACES_API_KEY:
         raise HTTPException(status_code=503, detail="Google Places API key not configured")
 
-    # Step 1: Get detailed plan from OpenAI
-    plan = await call_openai(request.query)
+    # Step 1: Get detailed plan from OpenAI (or reuse one for the same request)
+    plan = plan_cache.get(request.query)
+    if plan is None:
+        plan = await call_openai(request.query)
+        plan_cache.set(request.query, plan)
+
+    # Step 2: Look up the actual place for every activity with a search_query.
+    # Cache hits are resolved inline; the misses are dispatched at once so latency
+    # is the slowest lookup, not the sum. Activities that share a query (same
+    # restaurant on two days, say) share one lookup.
+    day_list = plan.get("days", [])
+    found: dict[tuple[int, int], PlaceSummary] = {}
+    misses: dict[str, tuple[str, list[tuple[int, int]]]] = {}
+
+    for day_idx, day_data in enumerate(day_list):
+        for act_idx, act in enumerate(day_data.get("activities", [])):
+            search_query = act.get("search_query")
+            if not search_query:
+                continue
+            key = places_cache.make_key(search_query)
+            if key in misses:
+                misses[key][1].append((day_idx, act_idx))
+                continue
+            cached = cached_places(key, 1)
+            if cached is None:
+                misses[key] = (search_query, [(day_idx, act_idx)])
+            elif cached:
+                found[(day_idx, act_idx)] = cached[0]
+
+    search_results = await asyncio.gather(
+        *(search_google_places(query, max_results=1) for query, _ in misses.values()),
+        return_exceptions=True,
+    )
+
+    for (_, positions), results in zip(misses.values(), search_results):
+        if isinstance(results, HTTPException):
+            continue  # Skip if search fails
+        if isinstance(results, BaseException):
+            raise results
+        if results:
+            for position in positions:
+                found[position] = results[0]
 
-    # Step 2: For each activity with a search_query, find the actual place
     days: list[DayPlan] = []
 
-    for day_data in plan.get("days", []):
+    for day_idx, day_data in enumerate(day_list):
         activities: list[Activity] = []
 
-        for act in day_data.get("activities", []):
-            search_query = act.get("search_query")
+        for act_idx, act in enumerate(day_data.get("activities", [])):
             place = None
-
-            if search_query:
-                try:
-                    results = await search_google_places(search_query, max_results=1)
-                    if results:
-                        place = PlaceSummary(**results[0], why=act.get("description"))
-                except HTTPException:
-                    pass  # Skip if search fails
+            result = found.get((day_idx, act_idx))
+            if result:
+                place = result.model_copy(update={"why": act.get("description")})
 
             activities.append(Activity(
                 activity_type=act.get("activity_type", "activity"),
@@ -588,11 +821,11 @@ async def create_plan(request: PlanRequest):
             activities=activities
         ))
 
-    return PlanResponse(
+    return json_response(PlanResponse(
         query=request.query,
         summary=plan.get("summary", ""),
         days=days
-    )
+    ))
 
 
 @app.get("/health")
@@ -608,6 +841,7 @@ def health_check():
             "google": google_limiter.status(),
         },
         "cache_entries": len(places_cache.cache),
+        "plan_cache_entries": len(plan_cache.cache),
     }
 
 
@@ -654,7 +888,7 @@ def create_sync_code():
 
 
 @app.get("/favorites/{sync_code}")
-def get_favorites(sync_code: str):
+def get_favorites(sync_code: str, if_none_match: str | None = Header(None)):
     """Get all favorites for a sync code."""
     if not SessionLocal:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -665,7 +899,7 @@ def get_favorites(sync_code: str):
             FavoritePlace.sync_code == sync_code.upper()
         ).all()
 
-        return {
+        return etag_response({
             "sync_code": sync_code.upper(),
             "favorites": [
                 {
@@ -681,7 +915,7 @@ def get_favorites(sync_code: str):
                 }
                 for f in favorites
             ]
-        }
+        }, if_none_match)
     finally:
         session.close()
 
@@ -764,8 +998,24 @@ class SaveTripRequest(BaseModel):
     days: list  # Full trip data
 
 
+def dump_trip_days(days: list) -> str:
+    """Encode a trip's days for the trip_data column."""
+    try:
+        return orjson.dumps(days).decode()
+    except orjson.JSONEncodeError:
+        return json.dumps(days)  # orjson rejects ints beyond 64 bits; json stores them as before
+
+
+def load_trip_days(trip_data: str) -> list:
+    """Decode a trip_data column."""
+    try:
+        return orjson.loads(trip_data)
+    except orjson.JSONDecodeError:
+        return json.loads(trip_data)  # Rows saved with json.dumps can hold NaN/Infinity
+
+
 @app.get("/trips/{sync_code}")
-def get_trips(sync_code: str):
+def get_trips(sync_code: str, if_none_match: str | None = Header(None)):
     """Get all saved trips for a sync code."""
     if not SessionLocal:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -776,19 +1026,19 @@ def get_trips(sync_code: str):
             SavedTrip.sync_code == sync_code.upper()
         ).order_by(SavedTrip.created_at.desc()).all()
 
-        return {
+        return etag_response({
             "sync_code": sync_code.upper(),
             "trips": [
                 {
                     "id": t.trip_id,
                     "query": t.query,
                     "summary": t.summary,
-                    "days": json.loads(t.trip_data),
+                    "days": load_trip_days(t.trip_data),
                     "savedAt": t.created_at.isoformat()
                 }
                 for t in trips
             ]
-        }
+        }, if_none_match)
     finally:
         session.close()
 
@@ -815,7 +1065,7 @@ def save_trip(sync_code: str, trip: SaveTripRequest):
             trip_id=trip.trip_id,
             query=trip.query,
             summary=trip.summary,
-            trip_data=json.dumps(trip.days)
+            trip_data=dump_trip_days(trip.days)
         )
         session.add(saved_trip)
         session.commit()
@@ -885,7 +1135,7 @@ def update_trip(sync_code: str, trip_id: str, updates: TripUpdateRequest):
         if updates.summary is not None:
             trip.summary = updates.summary
         if updates.days is not None:
-            trip.trip_data = json.dumps(updates.days)
+            trip.trip_data = dump_trip_days(updates.days)
 
         session.commit()
 
@@ -1010,12 +1260,12 @@ async def generate_playlist(query: str) -> dict:
     if openai_client is None:
         raise HTTPException(status_code=503, detail="OpenAI client not initialized")
 
-    allowed, reason = openai_limiter.check()
+    allowed, reason = openai_limiter.try_acquire()
     if not allowed:
         raise HTTPException(status_code=429, detail=reason)
 
     try:
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-4o-mini",
             response_format={"type": "json_object"},
             messages=[
@@ -1023,14 +1273,13 @@ async def generate_playlist(query: str) -> dict:
                 {"role": "user", "content": f"Create a playlist for this road trip: {query}"}
             ]
         )
-        openai_limiter.record()
 
         response_text = response.choices[0].message.content
-        return json.loads(response_text)
+        return orjson.loads(response_text)
 
     except openai.APIError as e:
         raise HTTPException(status_code=502, detail=f"OpenAI API error: {str(e)}")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to parse playlist response")
 
 
@@ -1,11 +1,15 @@
 """Integration tests for API endpoints."""
 
+import json
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 import sys
 sys.path.insert(0, '..')
 
-from main import app
+import main
+from main import app, etag_response
 
 
 @pytest.fixture(scope="module")
@@ -104,3 +108,130 @@ class TestPlanEndpoint:
             assert "summary" in data
             assert "days" in data
             assert isinstance(data["days"], list)
+
+    def test_plan_looks_up_repeated_query_once(self, client, monkeypatch):
+        """Should search once for activities whose queries differ only in case and spacing."""
+        # Same shape as the example in PLAN_SYSTEM_PROMPT
+        plan = {
+            "summary": "Taco Weekend in Austin",
+            "days": [
+                {
+                    "day": 1,
+                    "date_label": "Exploring Austin",
+                    "activities": [
+                        {"activity_type": "activity", "time_slot": "Start", "description": "Begin downtown", "search_query": None},
+                        {"activity_type": "food", "time_slot": "Lunch", "description": "Tacos for lunch", "search_query": "Veracruz All Natural Austin TX"},
+                    ],
+                },
+                {
+                    "day": 2,
+                    "date_label": "Back to the Taco Truck",
+                    "activities": [
+                        {"activity_type": "food", "time_slot": "Dinner", "description": "Tacos again for dinner", "search_query": "  veracruz all natural AUSTIN tx "},
+                    ],
+                },
+            ],
+        }
+        searches = []
+
+        async def fake_call_openai(query):
+            return plan
+
+        async def fake_search(query, max_results=5):
+            searches.append(query)
+            return [main.PlaceSummary(place_id="tacos", name="Veracruz", address="", lat=30.26, lng=-97.72)]
+
+        monkeypatch.setattr(main, "OPENAI_API_KEY", "test-key")
+        monkeypatch.setattr(main, "GOOGLE_PLACES_API_KEY", "test-key")
+        monkeypatch.setattr(main, "call_openai", fake_call_openai)
+        monkeypatch.setattr(main, "search_google_places", fake_search)
+        monkeypatch.setattr(main, "plan_cache", main.SearchCache())
+        monkeypatch.setattr(main, "places_cache", main.SearchCache())
+
+        response = client.post("/plan", json={"query": "taco weekend"})
+
+        assert response.status_code == 200
+        assert len(searches) == 1
+        data = response.json()
+        assert data["summary"] == "Taco Weekend in Austin"
+        start, lunch = data["days"][0]["activities"]
+        (dinner,) = data["days"][1]["activities"]
+        assert start["place"] is None
+        assert lunch["place"]["place_id"] == "tacos"
+        assert dinner["place"]["place_id"] == "tacos"
+        assert lunch["place"]["why"] == "Tacos for lunch"
+        assert dinner["place"]["why"] == "Tacos again for dinner"
+        assert dinner["time_slot"] == "Dinner"
+
+
+class TestTripsEndpoint:
+    """Tests for the saved trip endpoints."""
+
+    @pytest.fixture
+    def session_factory(self, client, tmp_path, monkeypatch):
+        """Back the trip endpoints with a throwaway SQLite database."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'trips.db'}")
+        main.Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine)
+        monkeypatch.setattr(main, "SessionLocal", factory)
+        return factory
+
+    def test_reads_legacy_row_with_nan(self, client, session_factory):
+        """Should serve a row written by json.dumps with NaN/Infinity instead of failing."""
+        session = session_factory()
+        session.add(main.SavedTrip(
+            sync_code="ABC123", trip_id="t1", query="q", summary="s",
+            trip_data=json.dumps([{"day": 1, "cost": float("nan"), "miles": float("inf")}]),
+        ))
+        session.commit()
+        session.close()
+
+        response = client.get("/trips/abc123")
+
+        assert response.status_code == 200
+        assert response.json()["trips"][0]["days"] == [{"day": 1, "cost": None, "miles": None}]
+
+    def test_saves_and_reads_back_days(self, client, session_factory):
+        """Should round-trip the saved days, including ints beyond 64 bits."""
+        days = [{"day": 1, "activities": []}, {"day": 2, "id": 2 ** 70}]
+        response = client.post("/trips/abc123", json={
+            "trip_id": "t1", "query": "q", "summary": "s", "days": days,
+        })
+        assert response.status_code == 200
+
+        session = session_factory()
+        stored = session.query(main.SavedTrip).one().trip_data
+        session.close()
+        assert json.loads(stored) == days
+
+        saved = client.get("/trips/ABC123").json()["trips"][0]
+        assert saved["days"][0] == days[0]
+
+
+class TestEtagResponse:
+    """Tests for the etag_response helper used by the sync GET endpoints."""
+
+    def test_returns_body_with_etag(self):
+        """Should return the JSON body with ETag and Cache-Control headers."""
+        response = etag_response({"favorites": []}, None)
+        assert response.status_code == 200
+        assert response.body == b'{"favorites":[]}'
+        assert response.headers["etag"].startswith('"')
+        assert response.headers["cache-control"] == "no-cache"
+
+    def test_returns_304_when_etag_matches(self):
+        """Should return an empty 304 when If-None-Match has the current ETag."""
+        etag = etag_response({"favorites": []}, None).headers["etag"]
+
+        response = etag_response({"favorites": []}, f'W/"old", {etag}')
+
+        assert response.status_code == 304
+        assert response.body == b""
+
+    def test_returns_body_when_content_changed(self):
+        """Should return the new body if the client's ETag is stale."""
+        etag = etag_response({"favorites": []}, None).headers["etag"]
+
+        response = etag_response({"favorites": [{"id": 1}]}, etag)
+
+        assert response.status_code == 200
@@ -84,3 +84,17 @@ class TestSearchCache:
 
         assert cache.get("coffee austin") == [{"name": "coffee"}]
         assert cache.get("bbq austin") == [{"name": "bbq"}]
+
+    def test_evicts_least_recently_used_when_full(self):
+        """Should drop the least recently used entry beyond maxsize."""
+        cache = SearchCache(ttl_seconds=60, maxsize=2)
+
+        cache.set("query1", [{"id": 1}])
+        cache.set("query2", [{"id": 2}])
+        cache.get("query1")  # query1 is now most recently used
+        cache.set("query3", [{"id": 3}])
+
+        assert cache.get("query2") is None
+        assert cache.get("query1") == [{"id": 1}]
+        assert cache.get("query3") == [{"id": 3}]
+        assert len(cache.cache) == 2
@@ -0,0 +1,225 @@
+"""Tests for the Google Places search helpers."""
+
+import asyncio
+import gc
+from types import SimpleNamespace
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import main
+from main import PlaceSummary, place_from_google, search_google_places
+
+
+def make_place(name: str) -> PlaceSummary:
+    return PlaceSummary(
+        place_id=name, name=name, address="", lat=0.0, lng=0.0, rating_count=0, category=""
+    )
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    """Replace the Places API call with a slow fake that records (key, max_results) per call."""
+    calls = []
+
+    async def _fetch(key, max_results):
+        calls.append((key, max_results))
+        await asyncio.sleep(0.05)
+        results = [make_place(f"{key} {i}") for i in range(max_results)]
+        main.places_cache.set_by_key(main.places_cache_key(key, max_results), results)
+        return results
+
+    monkeypatch.setattr(main, "_fetch_google_places", _fetch)
+    monkeypatch.setattr(main, "places_cache", main.SearchCache())
+    monkeypatch.setattr(main, "inflight_searches", {})
+    return calls
+
+
+class TestSearchGooglePlaces:
+    """Tests for search_google_places request sharing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_share_one_fetch(self, fake_fetch):
+        """Should make one API call for concurrent queries that normalize the same."""
+        first, second = await asyncio.gather(
+            search_google_places("Pike Place Market"),
+            search_google_places("  pike place market "),
+        )
+        assert fake_fetch == [("pike place market", 5)]
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_fetch(self, fake_fetch):
+        """Should still deliver results to the other caller when one is cancelled."""
+        cancelled = asyncio.create_task(search_google_places("Space Needle"))
+        survivor = asyncio.create_task(search_google_places("Space Needle"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+
+        results = await survivor
+        assert cancelled.cancelled()
+        assert len(results) == 5
+        assert fake_fetch == [("space needle", 5)]
+
+    @pytest.mark.asyncio
+    async def test_failed_fetch_without_waiters_is_not_reported_unretrieved(self, monkeypatch):
+        """Should retrieve a shielded fetch's error even when every waiter was cancelled."""
+        async def failing_fetch(key, max_results):
+            await asyncio.sleep(0.02)
+            raise main.HTTPException(status_code=502, detail="down")
+
+        monkeypatch.setattr(main, "_fetch_google_places", failing_fetch)
+        monkeypatch.setattr(main, "places_cache", main.SearchCache())
+        monkeypatch.setattr(main, "inflight_searches", {})
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+
+        waiter = asyncio.create_task(search_google_places("Space Needle"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.05)
+        del waiter
+        gc.collect()
+
+        assert main.inflight_searches == {}
+        assert errors == []
+
+    @pytest.mark.asyncio
+    async def test_fetches_only_as_many_results_as_needed(self, fake_fetch):
+        """Should round max_results up to the next fetch size rather than a full page."""
+        await search_google_places("Space Needle", max_results=1)
+        await search_google_places("Pike Place Market", max_results=3)
+        assert fake_fetch == [("space needle", 1), ("pike place market", 5)]
+
+    @pytest.mark.asyncio
+    async def test_joined_fetch_honors_each_callers_max_results(self, fake_fetch):
+        """Should not truncate a caller to a smaller in-flight fetch."""
+        one, ten = await asyncio.gather(
+            search_google_places("Pike Place Market", max_results=1),
+            search_google_places("Pike Place Market", max_results=10),
+        )
+        assert len(one) == 1
+        assert len(ten) == 10
+        assert fake_fetch == [("pike place market", 1), ("pike place market", 20)]
+
+    @pytest.mark.asyncio
+    async def test_smaller_caller_joins_larger_fetch(self, fake_fetch):
+        """Should reuse an in-flight fetch that asked for more results."""
+        ten, one = await asyncio.gather(
+            search_google_places("Pike Place Market", max_results=10),
+            search_google_places("Pike Place Market", max_results=1),
+        )
+        assert len(ten) == 10
+        assert one == ten[:1]
+        assert fake_fetch == [("pike place market", 20)]
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_honors_max_results(self, fake_fetch):
+        """Should serve smaller requests from a bigger cached fetch, and refetch for bigger ones."""
+        await search_google_places("Space Needle", max_results=5)
+        assert len(await search_google_places("Space Needle", max_results=1)) == 1
+        assert len(await search_google_places("Space Needle", max_results=10)) == 10
+        assert fake_fetch == [("space needle", 5), ("space needle", 20)]
+
+
+class TestPlaceFromGoogle:
+    """Tests for converting Places API results."""
+
+    @pytest.mark.parametrize("price_level, expected", [
+        ("PRICE_LEVEL_INEXPENSIVE", 1),
+        ("PRICE_LEVEL_MODERATE", 2),
+        ("PRICE_LEVEL_EXPENSIVE", 3),
+        ("PRICE_LEVEL_VERY_EXPENSIVE", 4),
+        ("PRICE_LEVEL_FREE", None),
+        ("PRICE_LEVEL_UNSPECIFIED", None),
+        (None, None),
+    ])
+    def test_price_level(self, price_level, expected):
+        """Should map Google's priceLevel enum onto the 1-4 scale."""
+        place = {"id": "abc123", "displayName": {"text": "Test Place"}}
+        if price_level is not None:
+            place["priceLevel"] = price_level
+        assert place_from_google(place).price_level == expected
+
+    def test_missing_optional_fields(self):
+        """Should fall back to defaults when optional fields are absent."""
+        place = place_from_google({"id": "abc123"})
+        assert place.name == ""
+        assert place.lat == 0.0
+        assert place.photo_url is None
+
+
+class FakeStream:
+    """Async iterator of chat completion chunks carrying the given text deltas."""
+
+    def __init__(self, deltas):
+        self.deltas = iter(deltas)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        for delta in self.deltas:
+            return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+        raise StopAsyncIteration
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Point call_openai at a fake client that streams the deltas given to it."""
+    def _stream(deltas):
+        async def create(**kwargs):
+            return FakeStream(deltas)
+
+        completions = SimpleNamespace(create=create)
+        monkeypatch.setattr(main, "openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    monkeypatch.setattr(main, "openai_limiter", main.RateLimiter(100, 100, "OpenAI"))
+    return _stream
+
+
+@pytest.fixture
+def prefetched(monkeypatch):
+    """Record prefetch_place calls instead of starting searches."""
+    queries = []
+    monkeypatch.setattr(main, "prefetch_place", queries.append)
+    return queries
+
+
+class TestStreamingPrefetch:
+    """Tests for prefetching search queries while the plan streams in."""
+
+    @pytest.mark.asyncio
+    async def test_match_split_across_chunks(self, fake_openai, prefetched):
+        """Should prefetch a search_query whose text arrives over several chunks."""
+        fake_openai(['{"days": [{"search_q', 'uery": "Pike Pl', 'ace Market"', '}]}'])
+        await main.call_openai("Seattle")
+        assert prefetched == ["Pike Place Market"]
+
+    @pytest.mark.asyncio
+    async def test_escaped_quotes_in_value(self, fake_openai, prefetched):
+        """Should decode escaped quotes instead of stopping at them."""
+        fake_openai(['{"search_query": "Joe\\"s ', 'Diner \\"Austin\\""}'])
+        plan = await main.call_openai("Austin")
+        assert prefetched == ['Joe"s Diner "Austin"']
+        assert plan["search_query"] == prefetched[0]
+
+    @pytest.mark.asyncio
+    async def test_no_prefetch_for_truncated_value(self, fake_openai, prefetched):
+        """Should not prefetch a value whose closing quote hasn't streamed yet."""
+        fake_openai(['{"search_query": "Pike Pl'])
+        with pytest.raises(main.HTTPException):
+            await main.call_openai("Seattle")
+        assert prefetched == []
+
+    @pytest.mark.asyncio
+    async def test_one_fetch_per_distinct_query(self, fake_openai, fake_fetch):
+        """Should make one Places request per distinct query, however often it is generated."""
+        fake_openai([
+            '{"days": [{"search_query": "Space Needle"}, ',
+            '{"search_query": "space needle"}, ',
+            '{"search_query": "Pike Place Market"}]}',
+        ])
+        await main.call_openai("Seattle")
+        await asyncio.gather(*main.background_tasks)
+        assert sorted(fake_fetch) == [("pike place market", 1), ("space needle", 1)]
@@ -79,3 +79,45 @@ class TestRateLimiter:
         allowed, reason = limiter.check()
 
         assert "TestAPI" in reason
+
+    def test_allows_requests_after_minute_window_expires(self, monkeypatch):
+        """Should evict old timestamps once the minute limit is reached."""
+        limiter = RateLimiter(per_minute=2, per_day=100, name="test")
+        now = time.monotonic()
+
+        monkeypatch.setattr(time, "monotonic", lambda: now - 61)
+        limiter.record()
+        limiter.record()
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+
+        allowed, reason = limiter.check()
+
+        assert allowed is True
+        assert limiter.status()["minute_used"] == 0
+        assert limiter.status()["day_used"] == 2
+
+    def test_try_acquire_records_allowed_requests(self):
+        """Should count a request as soon as it is allowed."""
+        limiter = RateLimiter(per_minute=2, per_day=100, name="test")
+
+        assert limiter.try_acquire() == (True, "")
+        assert limiter.try_acquire() == (True, "")
+        allowed, reason = limiter.try_acquire()
+
+        assert allowed is False
+        assert "2/minute" in reason
+        assert limiter.status()["minute_used"] == 2
+
+    def test_day_window_drops_only_expired_entries(self, monkeypatch):
+        """Should evict entries older than a day and keep the rest."""
+        limiter = RateLimiter(per_minute=100, per_day=3, name="test")
+        now = time.monotonic()
+
+        monkeypatch.setattr(time, "monotonic", lambda: now - 86401)
+        limiter.record()
+        limiter.record()
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+        limiter.record()
+
+        assert limiter.check() == (True, "")
+        assert limiter.status()["day_used"] == 1
@@ -6,15 +6,19 @@ vector embeddings that capture the "vibe" of each place based on its
 name, description, and reviews.
 
 Usage:
-    pip install sentence-transformers
+    pip install sentence-transformers orjson
     python compute_embeddings.py
 
-The output file can then be used for similarity search.
+The output (place metadata JSON + a binary .npy embedding matrix) can then
+be used for similarity search.
 """
 
-import json
+import os
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -25,9 +29,17 @@ from pathlib import Path
 # - Good semantic understanding for English text
 MODEL_NAME = "all-MiniLM-L6-v2"
 
+# Texts per forward pass when encoding (larger = faster, up to memory limits)
+BATCH_SIZE = 64
+
 # Input/output paths
 INPUT_FILE = Path(__file__).parent / "output" / "places_latest.json"
-OUTPUT_FILE = Path(__file__).parent / "output" / "places_with_embeddings.json"
+OUTPUT_FILE = Path(__file__).parent / "output" / "places_meta.json"  # Places without embeddings
+EMBEDDINGS_NPY = Path(__file__).parent / "output" / "place_embeddings.npy"  # Row i = place i
+
+# Set SAVE_DEBUG_TEXT=1 to keep the exact text each place was embedded from
+# in the output (up to ~2KB per place, so it's off by default)
+SAVE_DEBUG_TEXT = os.environ.get("SAVE_DEBUG_TEXT") == "1"
 
 
 # =============================================================================
@@ -99,17 +111,27 @@ def load_model():
     return model
 
 
-def compute_embedding(model, text):
+def compute_embeddings(model, texts):
     """
-    Convert text to a vector embedding.
+    Convert a list of texts to vector embeddings, one row per text.
 
-    The model reads the text and outputs a fixed-size vector (384 numbers)
+    The model reads each text and outputs a fixed-size vector (384 numbers)
     that represents the semantic meaning. Similar texts will have similar
     vectors (high cosine similarity).
+
+    All texts go through the model in batches rather than one call per text,
+    which lets the underlying matrix math run on many inputs at once.
     """
-    # encode() returns a numpy array, convert to list for JSON serialization
-    embedding = model.encode(text)
-    return embedding.tolist()
+    # Normalize to unit length so cosine similarity is a plain dot product
+    # (and the vectors quantize cleanly to int8 in search_places.py)
+    embeddings = model.encode(
+        texts,
+        batch_size=BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=True,
+    )
+    return embeddings.astype(np.float32)
 
 
 # =============================================================================
@@ -129,8 +151,8 @@ def run_embedding_pipeline():
             "Run fetch_places.py first to collect place data."
         )
 
-    with open(INPUT_FILE) as f:
-        data = json.load(f)
+    with open(INPUT_FILE, "rb") as f:
+        data = orjson.loads(f.read())
 
     places = data["places"]
     print(f"Loaded {len(places)} places")
@@ -138,35 +160,33 @@ def run_embedding_pipeline():
     # Step 2: Load the embedding model
     model = load_model()
 
-    # Step 3: Compute embeddings for each place
+    # Step 3: Compute embeddings for all places in batches
     print(f"\nComputing embeddings...")
 
-    for i, place in enumerate(places):
-        # Prepare the text
-        text = prepare_text_for_embedding(place)
+    texts = [prepare_text_for_embedding(place) for place in places]
+    if SAVE_DEBUG_TEXT:
+        for place, text in zip(places, texts):
+            place["embedding_text"] = text  # Save for debugging/inspection
 
-        # Compute embedding
-        embedding = compute_embedding(model, text)
-
-        # Add to place data
-        place["embedding"] = embedding
-        place["embedding_text"] = text  # Save for debugging/inspection
-
-        # Progress indicator
-        print(f"  [{i+1}/{len(places)}] {place['name']}")
+    emb_matrix = compute_embeddings(model, texts)
 
     # Step 4: Save results
-    print(f"\nSaving to: {OUTPUT_FILE}")
+    # Embeddings go to a binary .npy (a fraction of the size of JSON number
+    # lists, and loadable with a single read or mmap); metadata stays JSON.
+    print(f"\nSaving embeddings to: {EMBEDDINGS_NPY}")
+    np.save(EMBEDDINGS_NPY, emb_matrix)
+
+    print(f"Saving place data to: {OUTPUT_FILE}")
 
     output_data = {
         "model": MODEL_NAME,
-        "embedding_dimension": len(places[0]["embedding"]) if places else 0,
+        "embedding_dimension": model.get_sentence_embedding_dimension(),
         "total_places": len(places),
         "places": places,
     }
 
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(output_data, f, indent=2)
+    with open(OUTPUT_FILE, "wb") as f:
+        f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
 
     print(f"Done! Embeddings saved for {len(places)} places.")
     print(f"\nNext step: Run search_places.py to test vibe-based search")
@@ -2,19 +2,22 @@
 Fetch places from Google Places API for road trip planning.
 
 Usage:
+    pip install orjson tqdm
     export GOOGLE_PLACES_API_KEY="your-api-key"
     python fetch_places.py
 
 Customize searches by editing SEARCH_CONFIGS below.
 """
 
-import json
 import os
-import time
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlencode
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from tqdm import tqdm
 
 # =============================================================================
 # CONFIGURATION - Edit these to change what places you're searching for
@@ -59,6 +62,10 @@ SEARCH_CONFIGS = [
 
 BASE_URL = "https://maps.googleapis.com/maps/api/place"
 
+# How many Place Details requests to have in flight at once. Keeps us well
+# under Google's per-second quota while overlapping the round-trips.
+MAX_CONCURRENT_DETAILS = 10
+
 
 def get_api_key():
     """Get API key from environment variable."""
@@ -75,7 +82,7 @@ def make_request(url):
     """Make HTTP request and return JSON response."""
     req = urllib.request.Request(url)
     with urllib.request.urlopen(req, timeout=30) as response:
-        return json.loads(response.read().decode())
+        return orjson.loads(response.read())
 
 
 def text_search(query, api_key):
@@ -178,14 +185,22 @@ def extract_place_data(place_details, category):
 
 
 def deduplicate_places(places):
-    """Remove duplicate places based on place_id."""
-    seen = set()
-    unique = []
+    """
+    Merge duplicate places based on place_id.
+
+    The first record for a place wins, but any field it's missing (e.g. no
+    reviews or description that time) is filled in from later duplicates.
+    """
+    merged = {}
     for place in places:
-        if place["place_id"] not in seen:
-            seen.add(place["place_id"])
-            unique.append(place)
-    return unique
+        existing = merged.get(place["place_id"])
+        if existing is None:
+            merged[place["place_id"]] = place
+            continue
+        for field, value in place.items():
+            if value and not existing.get(field):
+                existing[field] = value
+    return list(merged.values())
 
 
 # =============================================================================
@@ -216,24 +231,23 @@ def fetch_places_for_config(config, api_key):
         # Limit results per query to spread across regions
         search_results = search_results[:max_per_query]
 
-        # Step 2: Fetch details for each place (includes reviews)
-        for i, result in enumerate(search_results):
-            place_id = result.get("place_id")
-            place_name = result.get("name", "Unknown")
-
-            print(f"  [{i+1}/{len(search_results)}] Getting details: {place_name}")
+        # Step 2: Fetch details for each place (includes reviews), several at a time
+        place_ids = [result.get("place_id") for result in search_results]
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DETAILS) as executor:
+            all_details = list(tqdm(
+                executor.map(lambda pid: get_place_details(pid, api_key), place_ids),
+                total=len(place_ids),
+                desc="  Getting details",
+            ))
 
-            details = get_place_details(place_id, api_key)
+        for result, details in zip(search_results, all_details):
             if details:
                 # Add place_id to details for deduplication
-                details["place_id"] = place_id
+                details["place_id"] = result.get("place_id")
                 place_data = extract_place_data(details, category)
                 if place_data:
                     all_places.append(place_data)
 
-            # Be nice to the API - small delay between requests
-            time.sleep(0.2)
-
     return all_places
 
 
@@ -274,15 +288,17 @@ def run_pipeline(configs=None):
         "places": unique_places,
     }
 
-    with open(output_file, "w") as f:
-        json.dump(output_data, f, indent=2)
+    output_bytes = orjson.dumps(output_data, option=orjson.OPT_INDENT_2)
+
+    with open(output_file, "wb") as f:
+        f.write(output_bytes)
 
     print(f"Saved to: {output_file}")
 
     # Also save a "latest" symlink/copy for convenience
     latest_file = output_dir / "places_latest.json"
-    with open(latest_file, "w") as f:
-        json.dump(output_data, f, indent=2)
+    with open(latest_file, "wb") as f:
+        f.write(output_bytes)
 
     print(f"Also saved to: {latest_file}")
 
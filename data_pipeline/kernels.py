@@ -0,0 +1,59 @@
+"""
+Numba kernels for vibe search.
+
+Optional: search_places.py uses these when numba is installed
+(pip install numba) and falls back to plain NumPy otherwise.
+"""
+
+import numpy as np
+from numba import get_num_threads, njit, prange
+
+
+def topk_cosine(embeddings, query, k):
+    """
+    Top-k places by dot product with the query, without a full scores array.
+
+    Fuses scoring and selection: each thread scores its slice of the rows and
+    keeps only a sorted list of its k best, and those few candidates are
+    merged at the end. For small to mid-sized corpora this avoids allocating
+    and re-scanning an N-long scores vector on every query.
+
+    Rows and query must be unit length (so dot product = cosine similarity).
+    Returns (indices, scores), highest score first.
+    """
+    return _topk_cosine(embeddings, query, k, get_num_threads())
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _topk_cosine(embeddings, query, k, n_threads):
+    n, dim = embeddings.shape
+    k = min(k, n)
+    n_chunks = max(1, min(n_threads, n))
+    chunk_size = (n + n_chunks - 1) // n_chunks
+
+    best_scores = np.full((n_chunks, k), -np.inf, dtype=np.float32)
+    best_ids = np.full((n_chunks, k), -1, dtype=np.int64)
+
+    for c in prange(n_chunks):
+        for i in range(c * chunk_size, min((c + 1) * chunk_size, n)):
+            score = np.float32(0.0)
+            for j in range(dim):
+                score += embeddings[i, j] * query[j]
+
+            if score <= best_scores[c, k - 1]:
+                continue
+
+            # Insert into this chunk's best-k list, kept sorted high to low
+            pos = k - 1
+            while pos > 0 and best_scores[c, pos - 1] < score:
+                best_scores[c, pos] = best_scores[c, pos - 1]
+                best_ids[c, pos] = best_ids[c, pos - 1]
+                pos -= 1
+            best_scores[c, pos] = score
+            best_ids[c, pos] = i
+
+    # Merge the per-chunk candidates (n_chunks * k of them)
+    flat_scores = best_scores.ravel()
+    order = np.argsort(-flat_scores)[:k]
+    return best_ids.ravel()[order], flat_scores[order]
+
@@ -5,106 +5,745 @@ This script lets you test vibe-based search on your embedded place data.
 Type a description of what you're looking for, and it returns the best matches.
 
 Usage:
+    pip install sentence-transformers orjson
+    pip install ijson  # optional: streams the legacy places_with_embeddings.json during conversion
     python search_places.py "chill dive bar with live country music"
+    python search_places.py "honky tonk; rooftop cocktail bar"  # several at once
+    python search_places.py --batch < queries.txt  # one query per line
     python search_places.py  # interactive mode
+    python search_places.py --compile  # torch.compile the encoder first (slow start, faster queries)
+
+Set USE_INT8_EMBEDDINGS=1 to keep the place embeddings in int8 (4x less memory).
+Set EMBEDDING_BACKEND=onnx (or openvino) to encode queries with a faster runtime.
+Set USE_ANN_INDEX=1 to search an HNSW index (pip install hnswlib) instead of every place.
+Set USE_GPU=1 to score places on a CUDA GPU (needs PyTorch with CUDA).
+With numba installed, small corpora are scored by the fused kernel in kernels.py.
 """
 
-import json
+import atexit
+import os
+import pickle
+import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+import orjson
+
+try:
+    from kernels import topk_cosine  # Fused Numba scoring + top-k (pip install numba)
+except ImportError:
+    topk_cosine = None
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
 MODEL_NAME = "all-MiniLM-L6-v2"
-EMBEDDINGS_FILE = Path(__file__).parent / "output" / "places_with_embeddings.json"
+OUTPUT_DIR = Path(__file__).parent / "output"
+
+# Written by compute_embeddings.py: place metadata + a float32 (N, D) matrix
+META_FILE = OUTPUT_DIR / "places_meta.json"
+EMBEDDINGS_NPY = OUTPUT_DIR / "place_embeddings.npy"
+ANN_INDEX_FILE = OUTPUT_DIR / "place_embeddings.hnsw"  # Built from the .npy when USE_ANN_INDEX=1
+ANN_INDEX_KEY_FILE = OUTPUT_DIR / "place_embeddings.hnsw.key"  # Which .npy the index was built from
+PLACES_CACHE = OUTPUT_DIR / "places_meta.pkl"  # Slimmed META_FILE, rebuilt when it changes
+
+# Older single-file format with the embeddings inlined as JSON lists
+EMBEDDINGS_FILE = OUTPUT_DIR / "places_with_embeddings.json"
+
+# The only place fields search results need; everything else (reviews, photos,
+# debug text) is dropped at load so it doesn't sit in memory
+PLACE_FIELDS = ("place_id", "name", "address", "description", "rating", "rating_count", "category")
+
+# Store the embedding matrix as int8 instead of float32. Cuts memory 4x with
+# near-identical rankings; NumPy has no int8 BLAS, so scoring is not faster.
+USE_INT8_EMBEDDINGS = os.environ.get("USE_INT8_EMBEDDINGS") == "1"
+
+# Inference backend for the query encoder: "torch" (default), "onnx" or "openvino".
+# ONNX Runtime / OpenVINO fuse the transformer graph and are typically 2-3x
+# faster on CPU. Needs sentence-transformers>=3.2 with its [onnx] or [openvino] extra.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+
+# Optional exported model file for the onnx/openvino backends. The model repo
+# ships int8 builds, e.g. "onnx/model_qint8_avx512_vnni.onnx" for VNNI CPUs.
+EMBEDDING_MODEL_FILE = os.environ.get("EMBEDDING_MODEL_FILE")
+
+# Where onnx/openvino exports of the encoder are kept, so the graph is only
+# converted from PyTorch once instead of on every start
+EXPORT_CACHE_DIR = Path.home() / ".cache" / "roadtrip"
+
+# Set to "bfloat16" to run the torch backend in BF16 (about 2x matmul throughput
+# on CPUs with AMX/AVX-512 BF16). Uses Intel Extension for PyTorch if installed.
+EMBEDDING_DTYPE = os.environ.get("EMBEDDING_DTYPE", "float32")
+
+# CPU threads for the torch encoder. One query is only ~20 tokens, too little
+# work to split, so extra threads just add fork/join overhead. Raise this when
+# encoding many queries at once (--batch).
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", "1"))
+
+# The HF tokenizer's own thread pool doesn't help with one short string either
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+# Answer queries from an approximate nearest-neighbor graph (HNSW, via hnswlib)
+# instead of scoring every place. Near-exact results in far fewer dot products;
+# only worth it once there are tens of thousands of places.
+USE_ANN_INDEX = os.environ.get("USE_ANN_INDEX") == "1"
+
+# Keep the embedding matrix in GPU memory (float16) and score and pick the
+# top-k there. Pays off for very large corpora, where CPU scoring is limited
+# by memory bandwidth. The encoder already runs on the GPU whenever one is available.
+USE_GPU = os.environ.get("USE_GPU") == "1"
+
+# Interactive mode reuses results for a query that means nearly the same as a
+# recent one (cosine similarity of the two query embeddings >= the threshold)
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = 0.97
+
+# Below this many places (and with numba installed) single queries go through
+# the fused kernel in kernels.py; above it, BLAS matmul + argpartition wins
+NUMBA_MAX_PLACES = 50_000
+
+# Interactive mode keeps query history here (up-arrow to rerun or edit one)
+HISTORY_FILE = Path.home() / ".roadtrip_history"
+
+# Split the matrix into this many row tiles, each scored and reduced to its own
+# top-k on a separate thread (NumPy releases the GIL). Helps on many-core and
+# multi-socket machines where one GEMV doesn't use all the memory bandwidth.
+# 1 = off (one BLAS call). Applies to corpora too big for the Numba kernel.
+SCORING_TILES = int(os.environ.get("SCORING_TILES", "1"))
+
+# Queries encoded together per model call in --batch mode
+QUERY_BATCH_SIZE = 32
 
 
 # =============================================================================
 # SIMILARITY MATH
 # =============================================================================
 
-def cosine_similarity(vec1, vec2):
+def build_embedding_matrix(vectors):
     """
-    Compute cosine similarity between two vectors.
+    Stack place embeddings into one float32 matrix with unit-length rows.
 
     Cosine similarity measures the angle between vectors:
     - 1.0 = identical direction (same meaning)
     - 0.0 = perpendicular (unrelated)
     - -1.0 = opposite direction (opposite meaning)
 
-    For embeddings, higher = more similar meaning.
+    Once every vector has length 1, cosine similarity is just the dot product,
+    so scoring every place against a query is one matrix-vector multiply.
+    """
+    embeddings = np.asarray(vectors, dtype=np.float32)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # Avoid division by zero (an all-zero vector just scores 0)
+    embeddings /= norms
+
+    return embeddings
+
+
+def quantize_int8(vectors):
+    """
+    Compress float vectors to int8 with one scale per vector.
+
+    Takes a (D,) vector or an (N, D) matrix and returns (quantized, scales)
+    where quantized * scales ~= vectors; scales has shape (1,) or (N, 1).
+    Each scale maps that row's largest absolute value to 127, so every row
+    uses the whole int8 range.
+    """
+    scales = np.abs(vectors).max(axis=-1, keepdims=True).astype(np.float32) / 127
+    scales[scales == 0] = 1.0  # An all-zero row quantizes to zeros either way
+    quantized = np.round(vectors / scales).astype(np.int8)
+    return quantized, scales
+
+
+def score_places(embeddings, query_embedding):
+    """
+    Cosine similarity of the query against every place.
+
+    embeddings is either the float32 matrix or the (int8 matrix, scales)
+    pair from quantize_int8. query_embedding is one vector (scores come back
+    as shape (N,)) or a (B, D) batch of queries (scores are (N, B)).
+    """
+    if isinstance(embeddings, tuple):
+        quantized, scales = embeddings
+        queries = np.atleast_2d(query_embedding)
+        query_quantized, query_scales = quantize_int8(queries)
+        # Accumulate in int32 - an int8 result would overflow
+        raw = np.matmul(quantized, query_quantized.T, dtype=np.int32)
+        scores = raw.astype(np.float32) * scales * query_scales.T  # Undo each row's scale
+        return scores if query_embedding.ndim == 2 else scores[:, 0]
+
+    return embeddings @ query_embedding.T
+
+
+@lru_cache(maxsize=None)
+def tile_pool(n_threads):
+    """Worker threads for tiled_top_k, created once."""
+    return ThreadPoolExecutor(max_workers=n_threads)
+
+
+def tiled_top_k(embeddings, query_embedding, k, n_tiles):
+    """
+    Top-k places for one query, scoring row tiles of the float32 matrix in parallel.
+
+    Each tile is scored and cut down to its own k best on a worker thread;
+    only those n_tiles * k candidates are merged at the end, so no thread
+    ever waits on a full N-long sort. Returns (indices, scores), highest first.
+    """
+    n = len(embeddings)
+    n_tiles = min(n_tiles, n)
+    bounds = np.linspace(0, n, n_tiles + 1, dtype=np.int64)
+
+    def tile_top_k(start, stop):
+        scores = embeddings[start:stop] @ query_embedding
+        tile_k = min(k, stop - start)
+        top = np.argpartition(scores, -tile_k)[-tile_k:]
+        return top + start, scores[top]
+
+    tiles = list(tile_pool(n_tiles).map(tile_top_k, bounds[:-1], bounds[1:]))
+    ids = np.concatenate([tile_ids for tile_ids, _ in tiles])
+    scores = np.concatenate([tile_scores for _, tile_scores in tiles])
+
+    order = np.argsort(-scores)[:k]
+    return ids[order], scores[order]
+
+
+class GpuEmbeddings:
+    """
+    The place embedding matrix copied once to GPU memory, as float16.
+
+    Scoring and top-k selection both run on the GPU, so only the query goes
+    in and only k (index, score) pairs come back per query.
+    """
+
+    def __init__(self, embeddings):
+        import torch
+
+        self.matrix = torch.from_numpy(np.ascontiguousarray(embeddings)).to("cuda", dtype=torch.float16)
+
+    def top_k(self, query_embedding, k):
+        """
+        Indices and scores of the k best places, highest first.
+
+        query_embedding is one vector (results have shape (k,)) or a (B, D)
+        batch (results are (k, B), one column per query).
+        """
+        import torch
+
+        query = torch.from_numpy(np.ascontiguousarray(query_embedding)).to("cuda", dtype=torch.float16)
+        all_scores = self.matrix @ (query.T if query.ndim == 2 else query)
+        scores, ids = torch.topk(all_scores, min(k, self.matrix.shape[0]), dim=0)
+        return ids.cpu().numpy(), scores.float().cpu().numpy()
+
+
+def load_ann_index(embeddings):
+    """
+    HNSW index over the unit-length place embeddings.
+
+    Building the graph is the slow part, so it's saved next to the embeddings
+    and reloaded on later runs. Like the metadata pickle it's keyed on the
+    .npy (modification time and size) and the matrix shape, and rebuilt
+    whenever any of them changes.
+
+    With inner-product space the index reports distance = 1 - dot product,
+    which for unit vectors is 1 - cosine similarity.
+    """
+    import hnswlib
+
+    stat = EMBEDDINGS_NPY.stat()
+    key = [stat.st_mtime_ns, stat.st_size, *embeddings.shape]
+
+    try:
+        up_to_date = ANN_INDEX_FILE.exists() and orjson.loads(ANN_INDEX_KEY_FILE.read_bytes()) == key
+    except (OSError, orjson.JSONDecodeError):
+        up_to_date = False
+
+    index = hnswlib.Index(space="ip", dim=embeddings.shape[1])
+    if up_to_date:
+        index.load_index(str(ANN_INDEX_FILE), max_elements=len(embeddings))
+        up_to_date = index.get_current_count() == len(embeddings)
+
+    if not up_to_date:
+        print(f"Building search index: {ANN_INDEX_FILE}")
+        index = hnswlib.Index(space="ip", dim=embeddings.shape[1])
+        index.init_index(max_elements=len(embeddings), M=16, ef_construction=200)
+        index.add_items(embeddings, np.arange(len(embeddings)))
+
+        # Swap the new index in before writing its key, so an interrupted
+        # save leaves a mismatched key (and a rebuild) rather than a bad index
+        tmp_path = ANN_INDEX_FILE.with_suffix(".tmp.hnsw")
+        index.save_index(str(tmp_path))
+        os.replace(tmp_path, ANN_INDEX_FILE)
+        ANN_INDEX_KEY_FILE.write_bytes(orjson.dumps(key))
+
+    index.set_ef(64)  # Search breadth: higher = better recall, slower queries
+    return index
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def slim_place(place):
+    """
+    Keep only the fields used to display a search result.
+
+    The derived display strings are worked out here, once per place, so
+    printing a result is just string formatting.
+    """
+    slim = {field: place[field] for field in PLACE_FIELDS if field in place}
+
+    # Location (extract city/state from address)
+    address = slim.get("address", "")
+    slim["location"] = ", ".join(address.split(", ")[-3:-1]) if address else "Unknown"
+
+    # Truncate description
+    desc = slim.get("description") or "(no description)"
+    if len(desc) > 100:
+        desc = desc[:100] + "..."
+    slim["short_description"] = desc
+
+    return slim
+
+
+def read_legacy_embeddings():
+    """
+    Read the older single-file format. Returns (places, float32 matrix).
+
+    With ijson installed the file is streamed one place at a time, and each
+    embedding is written straight into a matrix preallocated from the file's
+    header, so the N x D numbers never all exist as Python floats (24 bytes
+    each, vs 4 in the matrix). Otherwise the whole file is parsed with orjson.
+    """
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    with open(EMBEDDINGS_FILE, "rb") as f:
+        if ijson is not None:
+            total = next(ijson.items(f, "total_places"), None)
+            f.seek(0)
+            dimension = next(ijson.items(f, "embedding_dimension"), None)
+            f.seek(0)
+
+        if ijson is None or total is None or dimension is None:
+            places = orjson.loads(f.read())["places"]
+            vectors = np.asarray([place.pop("embedding") for place in places], dtype=np.float32)
+            return places, vectors
+
+        places = []
+        vectors = np.empty((total, dimension), dtype=np.float32)
+        for i, place in enumerate(ijson.items(f, "places.item", use_float=True)):
+            vectors[i] = place.pop("embedding")
+            places.append(place)
+
+    return places, vectors[:len(places)]
+
+
+def convert_legacy_embeddings():
+    """
+    One-time conversion of the older single-file format to the .npy matrix
+    plus metadata JSON that compute_embeddings.py writes.
+
+    Rows are normalized here, so later loads can mmap the matrix as-is.
+    """
+    print(f"Converting {EMBEDDINGS_FILE} (one-time)...")
+
+    places, vectors = read_legacy_embeddings()
+    embeddings = build_embedding_matrix(vectors)
+    np.save(EMBEDDINGS_NPY, embeddings)
+
+    meta = {
+        "model": MODEL_NAME,
+        "embedding_dimension": embeddings.shape[1],
+        "total_places": len(places),
+        "places": places,
+    }
+    with open(META_FILE, "wb") as f:
+        f.write(orjson.dumps(meta, option=orjson.OPT_INDENT_2))
+
+
+def load_place_meta():
+    """
+    The slimmed place list for META_FILE, from a pickle cache when it's current.
+
+    With the embeddings memory-mapped, parsing the metadata JSON (full reviews
+    and all) is most of what's left of startup. The slimmed list is pickled
+    alongside it, keyed on the JSON's modification time and the model, and
+    reused until either changes.
+    """
+    key = (META_FILE.stat().st_mtime_ns, MODEL_NAME, PLACE_FIELDS)
+
+    if PLACES_CACHE.exists():
+        try:
+            with open(PLACES_CACHE, "rb") as f:
+                cached_key, places = pickle.load(f)
+            if cached_key == key:
+                return places
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            pass  # Truncated or from an incompatible version; rebuild it below
+
+    with open(META_FILE, "rb") as f:
+        places = [slim_place(place) for place in orjson.loads(f.read())["places"]]
+
+    # Write to a temp file and swap it in, so an interrupted run can't leave a partial cache
+    tmp_path = PLACES_CACHE.with_suffix(".tmp.pkl")
+    with open(tmp_path, "wb") as f:
+        pickle.dump((key, places), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, PLACES_CACHE)
+
+    return places
+
+
+def load_places():
+    """
+    Load place metadata and the embedding matrix. Returns (places, embeddings).
+
+    Reads the binary .npy written by compute_embeddings.py, which is
+    memory-mapped so startup doesn't parse hundreds of thousands of floats.
+    An older JSON file with inlined embeddings is converted to that format
+    the first time it's seen.
+    """
+    if not (META_FILE.exists() and EMBEDDINGS_NPY.exists()):
+        if not EMBEDDINGS_FILE.exists():
+            print(f"Error: {EMBEDDINGS_NPY} not found")
+            print("Run compute_embeddings.py first.")
+            sys.exit(1)
+        convert_legacy_embeddings()
+
+    print(f"Loading embeddings from: {EMBEDDINGS_NPY}")
+    places = load_place_meta()
+    # Rows are already unit length (normalized when they were written)
+    embeddings = np.load(EMBEDDINGS_NPY, mmap_mode="r")
+    return places, embeddings
+
+
+def load_model():
+    """
+    Load the query encoder (same model the place embeddings were built with).
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if EMBEDDING_BACKEND == "torch":
+        import torch
+        torch.set_num_threads(TORCH_THREADS)
+        torch.set_num_interop_threads(1)
+
+        if EMBEDDING_DTYPE != "bfloat16":
+            return SentenceTransformer(MODEL_NAME)
+
+        model = SentenceTransformer(MODEL_NAME, model_kwargs={"torch_dtype": torch.bfloat16})
+        try:
+            import intel_extension_for_pytorch as ipex
+        except ImportError:
+            return model  # Plain BF16 weights still use the CPU's BF16 kernels
+        ipex.optimize(model[0].auto_model.eval(), dtype=torch.bfloat16, inplace=True)
+        return model
+
+    if EMBEDDING_MODEL_FILE:
+        # A prebuilt file from the model repo; nothing to export
+        model_kwargs = {"file_name": EMBEDDING_MODEL_FILE}
+        return SentenceTransformer(MODEL_NAME, backend=EMBEDDING_BACKEND, model_kwargs=model_kwargs)
+
+    export_dir = EXPORT_CACHE_DIR / f"{MODEL_NAME}-{EMBEDDING_BACKEND}"
+    if export_dir.exists():
+        return SentenceTransformer(str(export_dir), backend=EMBEDDING_BACKEND)
+
+    model = SentenceTransformer(MODEL_NAME, backend=EMBEDDING_BACKEND)
+
+    # Export into a temp sibling and rename it into place, so an interrupted
+    # or failed export never leaves a directory that later runs would trust
+    tmp_dir = export_dir.with_name(f"{export_dir.name}.tmp-{os.getpid()}")
+    try:
+        model.save_pretrained(str(tmp_dir))
+        os.replace(tmp_dir, export_dir)
+    except OSError:
+        pass  # Another run finished its export first, or the cache isn't writable
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return model
+
+
+def compile_model(model):
+    """
+    torch.compile the transformer inside the model for faster steady-state encoding.
+
+    Compiling happens on the first call, so a warmup encode runs here rather
+    than on the first real query. Falls back to the uncompiled model if
+    torch.compile isn't supported in this environment.
+    """
+    if EMBEDDING_BACKEND != "torch":
+        return model  # ONNX Runtime / OpenVINO graphs are already compiled
+
+    original = model[0].auto_model
+    try:
+        import torch
+        model[0].auto_model = torch.compile(original, dynamic=True)
+        model.encode("warmup", normalize_embeddings=True)
+    except Exception as e:
+        print(f"torch.compile failed, running uncompiled: {e}")
+        model[0].auto_model = original
+    return model
+
+
+def load_model_in_background(use_compile=False):
+    """
+    Start loading the query encoder on a background thread.
+
+    Importing torch/transformers and reading the weights takes a couple of
+    seconds, which can overlap with loading the places and with the user
+    typing their first query. Returns a function that waits for the model
+    (only if it's still loading) and returns it.
     """
-    # Dot product
-    dot_product = sum(a * b for a, b in zip(vec1, vec2))
+    loaded = {}
+
+    def load():
+        try:
+            model = load_model()
+            loaded["model"] = compile_model(model) if use_compile else model
+        except BaseException as e:  # Re-raised on the main thread by get_model
+            loaded["error"] = e
 
-    # Magnitudes
-    magnitude1 = sum(a * a for a in vec1) ** 0.5
-    magnitude2 = sum(b * b for b in vec2) ** 0.5
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
 
-    # Avoid division by zero
-    if magnitude1 == 0 or magnitude2 == 0:
-        return 0.0
+    def get_model():
+        if thread.is_alive():
+            print("(Waiting for the model to finish loading...)\n")
+            thread.join()
+        if "error" in loaded:
+            raise loaded["error"]
+        return loaded["model"]
 
-    return dot_product / (magnitude1 * magnitude2)
+    return get_model
+
+
+# =============================================================================
+# QUERY ENCODING AND CACHING
+# =============================================================================
+
+@lru_cache(maxsize=None)
+def can_encode_directly(model):
+    """
+    True if encode_one can stand in for model.encode on this model.
+
+    That needs the torch backend and the plain Transformer -> mean Pooling
+    (-> Normalize) layout that all-MiniLM-L6-v2 uses.
+    """
+    if EMBEDDING_BACKEND != "torch":
+        return False
+
+    from sentence_transformers.models import Normalize, Pooling, Transformer
+
+    modules = list(model)
+    return (
+        len(modules) in (2, 3)
+        and isinstance(modules[0], Transformer)
+        and isinstance(modules[1], Pooling)
+        and modules[1].get_pooling_mode_str() == "mean"
+        and all(isinstance(m, Normalize) for m in modules[2:])
+    )
+
+
+def encode_one(model, query):
+    """
+    Embed a single query by calling the transformer directly.
+
+    model.encode sorts, batches and pads its inputs and builds feature dicts
+    on every call, none of which does anything for one short string. A lone
+    query needs no padding, so mean pooling is just the mean over its tokens.
+    """
+    import torch
+
+    inputs = model.tokenizer(query, truncation=True, max_length=model.max_seq_length, return_tensors="pt")
+    inputs = {name: tensor.to(model.device) for name, tensor in inputs.items()}
+
+    with torch.inference_mode():
+        hidden = model[0].auto_model(**inputs).last_hidden_state[0]
+        embedding = torch.nn.functional.normalize(hidden.float().mean(dim=0), dim=0)
+
+    return embedding.cpu().numpy()
+
+
+@lru_cache(maxsize=512)
+def encode_query(model, query):
+    """
+    Convert query text to a unit-length float32 embedding.
+
+    Cached, so typing the exact same query again skips the model entirely.
+    """
+    if can_encode_directly(model):
+        embedding = encode_one(model, query)
+    else:
+        embedding = model.encode(query, normalize_embeddings=True)
+
+    # asarray skips the copy astype makes when it's already float32
+    embedding = np.asarray(embedding, dtype=np.float32)
+    embedding.flags.writeable = False  # Shared by every cache hit, so keep it read-only
+    return embedding
+
+
+class SemanticCache:
+    """
+    Results of recent searches, looked up by query meaning instead of exact text.
+
+    "dive bar live music" and "dive bars with live music" embed almost
+    identically, so the second can reuse the first's results without scoring
+    every place again. Entries are kept in a fixed-size ring (oldest evicted
+    first), and a lookup is one small matrix-vector multiply.
+    """
+
+    def __init__(self, maxsize=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.vectors = None  # (maxsize, D), allocated on the first add
+        self.results = []
+        self.next_slot = 0
+
+    def get(self, query_embedding):
+        """Return cached results for a similar enough query, or None."""
+        if not self.results:
+            return None
+        similarities = self.vectors[:len(self.results)] @ query_embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return self.results[best]
+        return None
+
+    def add(self, query_embedding, results):
+        """Store results for a query, overwriting the oldest entry when full."""
+        if self.vectors is None:
+            self.vectors = np.empty((self.maxsize, len(query_embedding)), dtype=np.float32)
+        self.vectors[self.next_slot] = query_embedding
+        if self.next_slot < len(self.results):
+            self.results[self.next_slot] = results
+        else:
+            self.results.append(results)
+        self.next_slot = (self.next_slot + 1) % self.maxsize
 
 
 # =============================================================================
 # SEARCH FUNCTION
 # =============================================================================
 
-def search(query, places, model, top_k=5):
+def search(query, places, embeddings, model, top_k=5, index=None, cache=None):
     """
     Find places that match the query vibe.
 
     How it works:
-    1. Convert query text to embedding (same model as places)
-    2. Compare query embedding to every place embedding
-    3. Return places with highest similarity scores
+    1. Convert query text to a unit-length embedding (same model as places)
+    2. Score every place at once: embeddings @ query = cosine similarities
+    3. Return (place, score) pairs for the highest similarity scores
 
     This is "semantic search" - it finds meaning similarity, not keyword matches.
     "dive bar with dancing" will match "honky-tonk with two-stepping"
     even though they share no words.
+
+    If an HNSW index (from load_ann_index) is passed, steps 2-3 are replaced
+    by an approximate nearest-neighbor lookup. If a SemanticCache is passed,
+    a similar earlier query's results are returned instead of searching.
     """
     # Embed the query
-    query_embedding = model.encode(query).tolist()
+    query_embedding = encode_query(model, query)
 
-    # Score all places
-    results = []
-    for place in places:
-        score = cosine_similarity(query_embedding, place["embedding"])
-        results.append({
-            "place": place,
-            "score": score,
-        })
+    if cache is not None:
+        results = cache.get(query_embedding)
+        if results is not None:
+            return results[:top_k]
 
-    # Sort by similarity (highest first)
-    results.sort(key=lambda x: x["score"], reverse=True)
+    results = find_top_k(places, embeddings, query_embedding, top_k, index)
+    if cache is not None:
+        cache.add(query_embedding, results)
+    return results
 
-    return results[:top_k]
 
+def find_top_k(places, embeddings, query_embedding, top_k, index=None):
+    """Best top_k places for an already embedded query, highest score first."""
+    if index is not None:
+        labels, distances = index.knn_query(query_embedding, k=min(top_k, len(places)))
+        return ann_results(places, labels[0], distances[0])
 
-def format_result(result, rank):
-    """Format a search result for display."""
-    place = result["place"]
-    score = result["score"]
+    if isinstance(embeddings, GpuEmbeddings):
+        ids, scores = embeddings.top_k(query_embedding, top_k)
+        return [(places[i], float(score)) for i, score in zip(ids, scores)]
 
-    # Location (extract city/state from address)
-    address = place.get("address", "")
-    location = ", ".join(address.split(", ")[-3:-1]) if address else "Unknown"
+    if topk_cosine is not None and isinstance(embeddings, np.ndarray) and len(places) < NUMBA_MAX_PLACES:
+        # np.asarray: numba takes a plain ndarray view, not the np.memmap subclass
+        ids, scores = topk_cosine(np.asarray(embeddings), query_embedding, top_k)
+        return [(places[i], float(score)) for i, score in zip(ids, scores)]
 
-    # Truncate description
-    desc = place.get("description") or "(no description)"
-    if len(desc) > 100:
-        desc = desc[:100] + "..."
+    if SCORING_TILES > 1 and isinstance(embeddings, np.ndarray):
+        ids, scores = tiled_top_k(embeddings, query_embedding, top_k, SCORING_TILES)
+        return [(places[i], float(score)) for i, score in zip(ids, scores)]
+
+    # Score all places in one matrix-vector multiply
+    scores = score_places(embeddings, query_embedding)
+
+    return rank_places(places, scores, top_k)
+
+
+def search_batch(queries, places, embeddings, model, top_k=5, index=None):
+    """
+    Run several searches at once. Returns one result list per query.
+
+    Encoding is mostly fixed per-call overhead for short queries, so the whole
+    batch goes through the model in one call, and all of it is scored against
+    the places in one matrix-matrix multiply.
+    """
+    query_embeddings = np.asarray(
+        model.encode(queries, batch_size=len(queries), normalize_embeddings=True),
+        dtype=np.float32,
+    )
+
+    if index is not None:
+        labels, distances = index.knn_query(query_embeddings, k=min(top_k, len(places)))
+        return [ann_results(places, row_labels, row_distances) for row_labels, row_distances in zip(labels, distances)]
+
+    if isinstance(embeddings, GpuEmbeddings):
+        ids, scores = embeddings.top_k(query_embeddings, top_k)
+        return [
+            [(places[i], float(score)) for i, score in zip(ids[:, b], scores[:, b])]
+            for b in range(len(queries))
+        ]
+
+    scores = score_places(embeddings, query_embeddings)  # (N, B): column b is query b
+    return [rank_places(places, scores[:, b], top_k) for b in range(len(queries))]
+
+
+def rank_places(places, scores, top_k):
+    """Turn one query's scores into its top_k results, highest score first."""
+    # Pick the top_k without sorting everything, then order just those. Partitioning
+    # on -k avoids building a negated copy of all N scores.
+    k = min(top_k, len(scores))
+    top = np.argpartition(scores, -k)[-k:]
+    top = top[np.argsort(-scores[top])]
+
+    return [(places[i], float(scores[i])) for i in top]
+
+
+def ann_results(places, labels, distances):
+    """Turn one query's HNSW neighbors into results (distance = 1 - cosine)."""
+    return [
+        (places[i], 1.0 - float(distance))
+        for i, distance in zip(labels, distances)
+    ]
+
+
+def format_result(result, rank):
+    """Format a (place, score) search result for display."""
+    place, score = result
 
     return f"""
 {rank}. {place['name']}
-   Location: {location}
+   Location: {place['location']}
    Rating: {place.get('rating', 'N/A')} ({place.get('rating_count', 0):,} reviews)
    Match: {score:.1%}
-   {desc}
+   {place['short_description']}
 """
 
 
@@ -112,36 +751,112 @@ def format_result(result, rank):
 # MAIN
 # =============================================================================
 
+def warm_up_kernel(embeddings, index=None):
+    """
+    Compile the Numba kernel (or load its cached build) before the first query.
+
+    Uses the real arrays so it compiles for the types queries will use: the
+    memory-mapped matrix and the cached query vectors are both read-only,
+    which Numba types separately from writable arrays. If the kernel can't
+    be compiled here, searches fall back to NumPy.
+    """
+    global topk_cosine
+    if topk_cosine is None or index is not None or not isinstance(embeddings, np.ndarray):
+        return
+    if not 0 < len(embeddings) < NUMBA_MAX_PLACES:
+        return
+
+    try:
+        topk_cosine(np.asarray(embeddings), embeddings[0], 1)
+    except Exception as e:  # numba.core.errors.NumbaError and friends
+        print(f"Numba kernel unavailable ({type(e).__name__}); scoring with NumPy instead")
+        topk_cosine = None
+
+
+def gpu_available():
+    """True if PyTorch can see a CUDA GPU; explains why not otherwise."""
+    try:
+        import torch
+    except ImportError:
+        print("USE_GPU=1 needs PyTorch; scoring on the CPU instead")
+        return False
+    if not torch.cuda.is_available():
+        print("USE_GPU=1 but no CUDA GPU found; scoring on the CPU instead")
+        return False
+    return True
+
+
+def enable_history():
+    """Turn on line editing and up-arrow history for input(), saved across runs."""
+    try:
+        import readline
+    except ImportError:
+        return  # Not available on Windows; input() still works, just without history
+
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass  # First run, or the file isn't readable
+    readline.set_history_length(1000)
+
+    def save_history():
+        try:
+            readline.write_history_file(HISTORY_FILE)
+        except OSError:
+            pass  # Losing history isn't worth an error on exit
+
+    atexit.register(save_history)
+
+
+def format_results(results):
+    """Format a whole result list as one string, ranked from 1."""
+    return "\n".join(format_result(result, i) for i, result in enumerate(results, 1))
+
+
+def print_results(query, results):
+    """Print one query's results under a header, in a single write."""
+    sys.stdout.write(f"Searching for: \"{query}\"\n\n{'=' * 60}\n{format_results(results)}\n")
+    sys.stdout.flush()
+
+
 def main():
-    # Load embeddings
-    print(f"Loading embeddings from: {EMBEDDINGS_FILE}")
+    args = sys.argv[1:]
+    use_compile = "--compile" in args
+    if use_compile:
+        args.remove("--compile")
 
-    if not EMBEDDINGS_FILE.exists():
-        print(f"Error: {EMBEDDINGS_FILE} not found")
-        print("Run compute_embeddings.py first.")
-        sys.exit(1)
+    # Load model (same one used for embeddings) while everything else gets ready
+    print(f"Loading model ({EMBEDDING_BACKEND} backend{', compiled' if use_compile else ''})...")
+    get_model = load_model_in_background(use_compile)
 
-    with open(EMBEDDINGS_FILE) as f:
-        data = json.load(f)
+    # Load embeddings
+    places, embeddings = load_places()
+    index = load_ann_index(embeddings) if USE_ANN_INDEX else None
+    if USE_GPU and gpu_available():
+        embeddings = GpuEmbeddings(embeddings)
+    elif USE_INT8_EMBEDDINGS:
+        embeddings = quantize_int8(embeddings)
+    warm_up_kernel(embeddings, index)
 
-    places = data["places"]
     print(f"Loaded {len(places)} places with embeddings\n")
 
-    # Load model (same one used for embeddings)
-    print("Loading model...")
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer(MODEL_NAME)
-    print("Ready!\n")
-
-    # Check for command line query
-    if len(sys.argv) > 1:
-        query = " ".join(sys.argv[1:])
-        print(f"Searching for: \"{query}\"\n")
-        print("=" * 60)
+    # Queries piped in on stdin, one per line
+    if args == ["--batch"]:
+        queries = [line.strip() for line in sys.stdin if line.strip()]
+        for start in range(0, len(queries), QUERY_BATCH_SIZE):
+            batch = queries[start:start + QUERY_BATCH_SIZE]
+            for query, results in zip(batch, search_batch(batch, places, embeddings, get_model(), index=index)):
+                print_results(query, results)
+        return
 
-        results = search(query, places, model)
-        for i, result in enumerate(results, 1):
-            print(format_result(result, i))
+    # Check for command line query (several can be separated with ";")
+    if args:
+        queries = [q.strip() for q in " ".join(args).split(";") if q.strip()]
+        if len(queries) == 1:
+            print_results(queries[0], search(queries[0], places, embeddings, get_model(), index=index))
+        elif queries:
+            for query, results in zip(queries, search_batch(queries, places, embeddings, get_model(), index=index)):
+                print_results(query, results)
 
         return
 
@@ -156,6 +871,10 @@ def main():
     print('  "rowdy bar with bull riding"')
     print("\nType 'quit' to exit\n")
 
+    enable_history()
+    cache = SemanticCache()
+    recent_results = {}  # Exact repeats (ignoring case) skip encoding and scoring
+
     while True:
         try:
             query = input("Search: ").strip()
@@ -173,11 +892,16 @@ def main():
         print(f"\nSearching for: \"{query}\"\n")
         print("-" * 60)
 
-        results = search(query, places, model)
-        for i, result in enumerate(results, 1):
-            print(format_result(result, i))
+        key = query.lower()
+        results = recent_results.get(key)
+        if results is None:
+            results = search(query, places, embeddings, get_model(), index=index, cache=cache)
+            if len(recent_results) >= SEMANTIC_CACHE_SIZE:
+                del recent_results[next(iter(recent_results))]  # Drop the oldest
+            recent_results[key] = results
 
-        print()
+        sys.stdout.write(format_results(results) + "\n\n")
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,275 @@
+"""Tests that every vibe search scoring path agrees with exact scoring."""
+
+import numpy as np
+import orjson
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+import search_places
+from search_places import (
+    SemanticCache, build_embedding_matrix, convert_legacy_embeddings, find_top_k,
+    load_ann_index, quantize_int8, rank_places, score_places, search_batch, tiled_top_k,
+)
+
+N_PLACES = 2000
+DIMENSION = 64
+TOP_K = 10
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    """Random unit-length place embeddings, read-only like the memory-mapped .npy."""
+    rng = np.random.default_rng(0)
+    matrix = build_embedding_matrix(rng.standard_normal((N_PLACES, DIMENSION)))
+    matrix.flags.writeable = False
+    return matrix
+
+
+@pytest.fixture(scope="module")
+def queries():
+    """A few random unit-length query embeddings."""
+    rng = np.random.default_rng(1)
+    return build_embedding_matrix(rng.standard_normal((4, DIMENSION)))
+
+
+@pytest.fixture(scope="module")
+def places():
+    """Each place is just its row index, so results can be compared to argsort."""
+    return list(range(N_PLACES))
+
+
+def exact_top_k(embeddings, query, k=TOP_K):
+    """Reference result: indices of the k highest dot products."""
+    return list(np.argsort(-(embeddings @ query))[:k])
+
+
+class FakeModel:
+    """Stands in for the sentence transformer, mapping each query text to a fixed vector."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, queries, batch_size=32, normalize_embeddings=True):
+        return np.stack([self.vectors[query] for query in queries])
+
+
+class TestExactScoring:
+    """Tests for the default float32 scoring path."""
+
+    def test_find_top_k_matches_argsort(self, places, embeddings, queries, monkeypatch):
+        """Should return the exact top-k, highest score first."""
+        monkeypatch.setattr(search_places, "topk_cosine", None)
+        for query in queries:
+            results = find_top_k(places, embeddings, query, TOP_K)
+            assert [place for place, _ in results] == exact_top_k(embeddings, query)
+
+    def test_rank_places_scores_are_sorted(self, places, embeddings, queries):
+        """Should report each place's score, highest first."""
+        scores = embeddings @ queries[0]
+        results = rank_places(places, scores, TOP_K)
+        assert [score for _, score in results] == sorted(scores[exact_top_k(embeddings, queries[0])], reverse=True)
+
+    def test_search_batch_matches_single_queries(self, places, embeddings, queries):
+        """Should score a batch the same as each query on its own."""
+        names = [f"query {i}" for i in range(len(queries))]
+        model = FakeModel(dict(zip(names, queries)))
+
+        batch_results = search_batch(names, places, embeddings, model, top_k=TOP_K)
+
+        for query, results in zip(queries, batch_results):
+            assert [place for place, _ in results] == exact_top_k(embeddings, query)
+
+
+class TestInt8Scoring:
+    """Tests for int8-quantized embeddings."""
+
+    def test_quantize_round_trips(self, embeddings):
+        """Should reconstruct each row to within half a quantization step."""
+        quantized, scales = quantize_int8(embeddings)
+        assert quantized.dtype == np.int8
+        assert scales.shape == (N_PLACES, 1)
+        assert np.all(np.abs(quantized * scales - embeddings) <= scales / 2 + 1e-7)
+
+    def test_scores_close_to_float32(self, embeddings, queries):
+        """Should score within a small tolerance of the float32 dot product."""
+        scores = score_places(quantize_int8(embeddings), queries[0])
+        assert scores.shape == (N_PLACES,)
+        assert np.max(np.abs(scores - embeddings @ queries[0])) < 0.02
+
+    def test_top_k_mostly_matches(self, places, embeddings, queries):
+        """Should keep most of the exact top-k, for single and batched queries."""
+        quantized = quantize_int8(embeddings)
+        names = [f"query {i}" for i in range(len(queries))]
+        batch_results = search_batch(names, places, quantized, FakeModel(dict(zip(names, queries))), top_k=TOP_K)
+
+        for query, batch in zip(queries, batch_results):
+            single = find_top_k(places, quantized, query, TOP_K)
+            expected = set(exact_top_k(embeddings, query))
+            assert len(expected & {place for place, _ in single}) >= TOP_K - 2
+            assert [place for place, _ in batch] == [place for place, _ in single]
+
+
+class TestTiledScoring:
+    """Tests for scoring row tiles on a thread pool."""
+
+    @pytest.mark.parametrize("n_tiles", [1, 3, 8])
+    def test_matches_argsort(self, embeddings, queries, n_tiles):
+        """Should find the exact top-k however the rows are split."""
+        for query in queries:
+            ids, scores = tiled_top_k(embeddings, query, TOP_K, n_tiles)
+            assert list(ids) == exact_top_k(embeddings, query)
+            assert np.allclose(scores, (embeddings @ query)[ids])
+
+    def test_tiles_smaller_than_k(self, embeddings, queries):
+        """Should still find the top-k when each tile has fewer than k rows."""
+        small = embeddings[:20]
+        ids, _ = tiled_top_k(small, queries[0], TOP_K, 8)
+        assert list(ids) == exact_top_k(small, queries[0])
+
+    def test_find_top_k_uses_tiles(self, places, embeddings, queries, monkeypatch):
+        """Should give the same results through find_top_k with SCORING_TILES set."""
+        monkeypatch.setattr(search_places, "topk_cosine", None)
+        monkeypatch.setattr(search_places, "SCORING_TILES", 4)
+        results = find_top_k(places, embeddings, queries[0], TOP_K)
+        assert [place for place, _ in results] == exact_top_k(embeddings, queries[0])
+
+
+class TestNumbaKernel:
+    """Tests for the fused Numba scoring + top-k kernel."""
+
+    def test_matches_argsort(self, embeddings, queries):
+        """Should find the exact top-k for read-only inputs."""
+        pytest.importorskip("numba")
+        from kernels import topk_cosine
+
+        for query in queries:
+            query = query.copy()
+            query.flags.writeable = False
+            ids, scores = topk_cosine(embeddings, query, TOP_K)
+            assert list(ids) == exact_top_k(embeddings, query)
+            assert np.allclose(scores, (embeddings @ query)[ids], atol=1e-5)
+
+    def test_k_larger_than_places(self, embeddings, queries):
+        """Should return every place when k exceeds the place count."""
+        pytest.importorskip("numba")
+        from kernels import topk_cosine
+
+        ids, _ = topk_cosine(embeddings[:3], queries[0], TOP_K)
+        assert list(ids) == exact_top_k(embeddings[:3], queries[0], 3)
+
+
+class TestAnnIndex:
+    """Tests for the HNSW index path."""
+
+    @pytest.fixture
+    def index_paths(self, tmp_path, monkeypatch, embeddings):
+        """Point the .npy, index and key files at a temp directory."""
+        pytest.importorskip("hnswlib")
+        npy = tmp_path / "place_embeddings.npy"
+        np.save(npy, embeddings)
+        monkeypatch.setattr(search_places, "EMBEDDINGS_NPY", npy)
+        monkeypatch.setattr(search_places, "ANN_INDEX_FILE", tmp_path / "place_embeddings.hnsw")
+        monkeypatch.setattr(search_places, "ANN_INDEX_KEY_FILE", tmp_path / "place_embeddings.hnsw.key")
+        return npy
+
+    def test_recall_against_argsort(self, places, embeddings, queries, index_paths):
+        """Should find most of the exact top-k, with cosine similarity scores."""
+        index = load_ann_index(np.load(index_paths, mmap_mode="r"))
+        found = 0
+        for query in queries:
+            results = find_top_k(places, embeddings, query, TOP_K, index)
+            found += len(set(exact_top_k(embeddings, query)) & {place for place, _ in results})
+            for place, score in results:
+                assert score == pytest.approx(float(embeddings[place] @ query), abs=1e-4)
+
+        # Random high-dimensional vectors are a hard case for HNSW; real embeddings cluster
+        assert found / (TOP_K * len(queries)) >= 0.8
+
+    def test_finds_exact_match(self, places, embeddings, index_paths):
+        """Should return a place first when queried with its own embedding."""
+        index = load_ann_index(np.load(index_paths, mmap_mode="r"))
+        for i in (0, 777, N_PLACES - 1):
+            (place, score), *_ = find_top_k(places, embeddings, embeddings[i], TOP_K, index)
+            assert place == i
+            assert score == pytest.approx(1.0, abs=1e-4)
+
+    def test_rebuilds_when_embeddings_change(self, embeddings, queries, index_paths, capsys):
+        """Should reuse a saved index, and rebuild it once the .npy is rewritten."""
+        load_ann_index(np.load(index_paths, mmap_mode="r"))
+        load_ann_index(np.load(index_paths, mmap_mode="r"))
+        assert capsys.readouterr().out.count("Building search index") == 1
+
+        changed = embeddings[::-1].copy()
+        np.save(index_paths, changed)
+        index = load_ann_index(np.load(index_paths, mmap_mode="r"))
+        assert "Building search index" in capsys.readouterr().out
+        labels, _ = index.knn_query(queries[0], k=1)
+        assert labels[0][0] == exact_top_k(changed, queries[0], 1)[0]
+
+
+class TestSemanticCache:
+    """Tests for the SemanticCache class."""
+
+    def test_hit_for_similar_query(self, queries):
+        """Should return cached results for a nearly identical query."""
+        cache = SemanticCache(maxsize=4, threshold=0.97)
+        cache.add(queries[0], ["result"])
+
+        nearby = build_embedding_matrix([queries[0] + 0.01 * queries[1]])[0]
+        assert cache.get(nearby) == ["result"]
+
+    def test_miss_for_different_query(self, queries):
+        """Should return None for an unrelated query."""
+        cache = SemanticCache(maxsize=4, threshold=0.97)
+        cache.add(queries[0], ["result"])
+        assert cache.get(queries[1]) is None
+
+    def test_evicts_oldest_when_full(self, queries):
+        """Should overwrite the oldest entry once maxsize is reached."""
+        cache = SemanticCache(maxsize=2, threshold=0.97)
+        for i in range(3):
+            cache.add(queries[i], [i])
+
+        assert cache.get(queries[0]) is None
+        assert cache.get(queries[1]) == [1]
+        assert cache.get(queries[2]) == [2]
+
+
+class TestLegacyConversion:
+    """Tests for converting the older single-file embeddings format."""
+
+    @pytest.mark.parametrize("use_ijson", [True, False])
+    def test_converts_to_normalized_npy(self, tmp_path, monkeypatch, use_ijson):
+        """Should write unit-length rows and the metadata, with or without ijson."""
+        if use_ijson:
+            pytest.importorskip("ijson")
+        else:
+            monkeypatch.setitem(sys.modules, "ijson", None)  # Makes "import ijson" fail
+
+        rng = np.random.default_rng(2)
+        vectors = rng.standard_normal((5, 8)).astype(np.float32)
+        legacy = {
+            "total_places": 5,
+            "embedding_dimension": 8,
+            "places": [
+                {"place_id": str(i), "name": f"Place {i}", "embedding": vector.tolist()}
+                for i, vector in enumerate(vectors)
+            ],
+        }
+        (tmp_path / "legacy.json").write_bytes(orjson.dumps(legacy))
+        monkeypatch.setattr(search_places, "EMBEDDINGS_FILE", tmp_path / "legacy.json")
+        monkeypatch.setattr(search_places, "EMBEDDINGS_NPY", tmp_path / "place_embeddings.npy")
+        monkeypatch.setattr(search_places, "META_FILE", tmp_path / "places_meta.json")
+
+        convert_legacy_embeddings()
+
+        converted = np.load(tmp_path / "place_embeddings.npy")
+        expected = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        assert converted.dtype == np.float32
+        assert np.allclose(converted, expected, atol=1e-6)
+
+        meta = orjson.loads((tmp_path / "places_meta.json").read_bytes())
+        assert meta["total_places"] == 5
+        assert [place["name"] for place in meta["places"]] == [f"Place {i}" for i in range(5)]
+        assert all("embedding" not in place for place in meta["places"])